@@ -4,9 +4,10 @@ import sys
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from queue import Empty, SimpleQueue
 
-from PySide6.QtCore import QSize, Qt, QThreadPool
-from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtCore import QSize, QStandardPaths, Qt, QThreadPool, QTimer
+from PySide6.QtGui import QIcon, QImage, QPixmap
 from PySide6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -24,8 +25,13 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from .processor import ProcessResult, collect_images_from_directory, is_supported_image
-from .worker import ImageWorker
+from .processor import (
+    ProcessResult,
+    collect_images_from_directory,
+    is_supported_image,
+    warn_if_slow_jpeg_backend,
+)
+from .worker import ImageWorker, ThumbnailSignals, ThumbnailWorker, prune_thumbnail_cache
 
 
 @dataclass(slots=True)
@@ -54,10 +60,33 @@ class MainWindow(QMainWindow):
         self.thread_pool = QThreadPool.globalInstance()
         self.thread_pool.setMaxThreadCount(3)
         self._active_workers: list[ImageWorker] = []
+        self._result_queue: SimpleQueue[tuple[int, ProcessResult | None]] = SimpleQueue()
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setInterval(50)
+        self._drain_timer.timeout.connect(self._drain_results)
+
+        # Separate pool so thumbnail decoding never competes with image processing.
+        self.thumbnail_pool = QThreadPool(self)
+        self.thumbnail_pool.setMaxThreadCount(4)
+        self.thumbnail_signals = ThumbnailSignals(self)
+        self.thumbnail_signals.ready.connect(self._on_thumbnail_ready)
+        placeholder = QPixmap(56, 56)
+        placeholder.fill(Qt.lightGray)
+        self._placeholder_icon = QIcon(placeholder)
 
         self.error_log_path: Path | None = None
         self._error_log_stream = None
 
+        self._thumbnail_cache_dir: Path | None = None
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        if cache_root:
+            try:
+                self._thumbnail_cache_dir = Path(cache_root) / "thumbnails"
+                self._thumbnail_cache_dir.mkdir(parents=True, exist_ok=True)
+                prune_thumbnail_cache(self._thumbnail_cache_dir)
+            except OSError:
+                self._thumbnail_cache_dir = None
+
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -151,6 +180,7 @@ class MainWindow(QMainWindow):
         if self.processing:
             QMessageBox.warning(self, "Procesando", "No puedes limpiar la lista durante el procesamiento.")
             return
+        self.thumbnail_pool.clear()
         self.records.clear()
         self.path_to_row.clear()
         self.table.setRowCount(0)
@@ -175,22 +205,30 @@ class MainWindow(QMainWindow):
 
             file_item = QTableWidgetItem(normalized.name)
             file_item.setToolTip(str(normalized))
-            pixmap = QPixmap(str(normalized))
-            if not pixmap.isNull():
-                thumb = pixmap.scaled(56, 56, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                file_item.setIcon(QIcon(thumb))
+            file_item.setIcon(self._placeholder_icon)
 
             status_item = QTableWidgetItem("pendiente")
             details_item = QTableWidgetItem("")
             self.table.setItem(row, 0, file_item)
             self.table.setItem(row, 1, status_item)
             self.table.setItem(row, 2, details_item)
+            self.thumbnail_pool.start(
+                ThumbnailWorker(normalized, self._thumbnail_cache_dir, self.thumbnail_signals)
+            )
             added += 1
 
         if added > 0 and not self.output_edit.text().strip():
             default_out = self.records[0].path.parent / "salida_800"
             self.output_edit.setText(str(default_out))
 
+    def _on_thumbnail_ready(self, path: Path, thumb: QImage) -> None:
+        row = self.path_to_row.get(path)
+        if row is None:
+            return
+        file_item = self.table.item(row, 0)
+        if file_item is not None:
+            file_item.setIcon(QIcon(QPixmap.fromImage(thumb)))
+
     def _set_row_status(self, row: int, status: str, message: str) -> None:
         status_item = self.table.item(row, 1) or QTableWidgetItem()
         details_item = self.table.item(row, 2) or QTableWidgetItem()
@@ -251,16 +289,37 @@ class MainWindow(QMainWindow):
                 output_dir=output_dir,
                 overwrite=overwrite,
                 safe_mode=safe_mode,
+                result_queue=self._result_queue,
             )
-            worker.signals.started.connect(self._on_worker_started)
-            worker.signals.finished.connect(self._on_worker_finished)
             self._active_workers.append(worker)
             self.thread_pool.start(worker)
 
-    def _on_worker_started(self, row: int) -> None:
-        self._set_row_status(row, "procesando", "Trabajando...")
+        self._drain_timer.start()
+
+    def _drain_results(self, max_items: int = 32) -> None:
+        drained = 0
+        while drained < max_items:
+            try:
+                row, result = self._result_queue.get_nowait()
+            except Empty:
+                break
+            drained += 1
+            if result is None:
+                self._set_row_status(row, "procesando", "Trabajando...")
+            else:
+                self._record_result(row, result)
+
+        if drained == 0:
+            return
+
+        percentage = int((self.completed_jobs / max(1, self.total_jobs)) * 100)
+        self.progress_bar.setValue(percentage)
+        self.progress_label.setText(f"{self.completed_jobs}/{self.total_jobs}")
+
+        if self.completed_jobs >= self.total_jobs:
+            self._finish_processing()
 
-    def _on_worker_finished(self, row: int, result: ProcessResult) -> None:
+    def _record_result(self, row: int, result: ProcessResult) -> None:
         if result.status == "ok":
             status_text = "ok"
             self.success_count += 1
@@ -275,14 +334,7 @@ class MainWindow(QMainWindow):
         self.records[row].status = status_text
         self.records[row].message = result.message
         self._set_row_status(row, status_text, result.message)
-
         self.completed_jobs += 1
-        percentage = int((self.completed_jobs / max(1, self.total_jobs)) * 100)
-        self.progress_bar.setValue(percentage)
-        self.progress_label.setText(f"{self.completed_jobs}/{self.total_jobs}")
-
-        if self.completed_jobs >= self.total_jobs:
-            self._finish_processing()
 
     def _write_error_log(self, result: ProcessResult) -> None:
         if self._error_log_stream is None and self.error_log_path is not None:
@@ -291,7 +343,6 @@ class MainWindow(QMainWindow):
         if self._error_log_stream is not None:
             error_text = result.message.replace("\n", " ").replace(",", ";")
             self._error_log_stream.write(f"{result.input_path},{error_text}\n")
-            self._error_log_stream.flush()
 
     def _close_error_log(self) -> None:
         if self._error_log_stream is not None:
@@ -299,6 +350,7 @@ class MainWindow(QMainWindow):
             self._error_log_stream = None
 
     def _finish_processing(self) -> None:
+        self._drain_timer.stop()
         self.processing = False
         self._set_controls_enabled(True)
         self._active_workers.clear()
@@ -316,7 +368,10 @@ class MainWindow(QMainWindow):
 
 
 def run() -> int:
+    warn_if_slow_jpeg_backend()
     app = QApplication(sys.argv)
+    # Gives QStandardPaths an app-specific cache dir instead of one named after the interpreter.
+    app.setApplicationName("mockup-manager")
     window = MainWindow()
     window.show()
     return app.exec()
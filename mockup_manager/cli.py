@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import argparse
 from datetime import datetime
+from multiprocessing import freeze_support
 from pathlib import Path
 
-from .processor import collect_images_from_directory, process_batch
+from .processor import collect_images_from_directory, process_batch, warn_if_slow_jpeg_backend
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -41,6 +42,7 @@ def build_parser() -> argparse.ArgumentParser:
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    warn_if_slow_jpeg_backend()
 
     input_dir = Path(args.input_dir)
     output_dir = Path(args.output_dir)
@@ -90,4 +92,5 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
+    freeze_support()
     raise SystemExit(main())
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
+from io import BytesIO
 from pathlib import Path
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Iterator, cast
 
 import numpy as np
-from PIL import Image, ImageFilter, ImageOps
+from PIL import Image, ImageFilter, features
+
+logger = logging.getLogger(__name__)
 
 TARGET_SIZE = (800, 800)
 SUPPORTED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".tif", ".tiff"}
+# JPEGs are decoded at the smallest libjpeg scale that still covers this size,
+# keeping 2x headroom over TARGET_SIZE for the final LANCZOS resize.
+JPEG_DRAFT_SIZE = (TARGET_SIZE[0] * 2, TARGET_SIZE[1] * 2)
 
 
 @dataclass(slots=True)
@@ -21,8 +30,22 @@ class ProcessResult:
     crop_method: str = "fallback_center"
 
 
+def warn_if_slow_jpeg_backend() -> None:
+    # Called once by the CLI/GUI entry points, never on import, so process-pool
+    # workers don't repeat it.
+    if not features.check("libjpeg_turbo"):
+        logger.warning("Pillow no usa libjpeg-turbo; la lectura/escritura de JPEG sera mas lenta.")
+
+
 def is_supported_image(path: Path | str) -> bool:
-    return Path(path).suffix.lower() in SUPPORTED_EXTENSIONS
+    name = path.name if isinstance(path, Path) else os.path.basename(path)
+    return _has_supported_suffix(name)
+
+
+def _has_supported_suffix(name: str) -> bool:
+    # Same rule as Path.suffix (a leading dot is not an extension), without building a Path.
+    dot = name.rfind(".")
+    return dot > 0 and name[dot:].lower() in SUPPORTED_EXTENSIONS
 
 
 def collect_images_from_directory(directory: Path | str, recursive: bool = True) -> list[Path]:
@@ -30,9 +53,25 @@ def collect_images_from_directory(directory: Path | str, recursive: bool = True)
     if not base_dir.exists():
         return []
 
-    iterator = base_dir.rglob("*") if recursive else base_dir.glob("*")
-    files = [path for path in iterator if path.is_file() and is_supported_image(path)]
-    return sorted(files)
+    return sorted(_iter_image_files(str(base_dir), recursive))
+
+
+def _iter_image_files(directory: str, recursive: bool) -> Iterator[Path]:
+    # The extension is checked on the entry name before any stat; DirEntry reuses
+    # the file type reported by the directory listing for regular entries.
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            yield from _iter_image_files(entry.path, recursive)
+                    elif _has_supported_suffix(entry.name) and entry.is_file():
+                        yield Path(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        return
 
 
 def build_output_path(input_path: Path, output_dir: Path) -> Path:
@@ -46,66 +85,105 @@ def _center_crop_box(width: int, height: int) -> tuple[int, int, int, int]:
     return left, top, left + side, top + side
 
 
+_EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
 def _prepare_image(input_path: Path) -> tuple[Image.Image, bytes | None, bytes | None]:
     with Image.open(input_path) as source:
+        if source.format == "JPEG":
+            # Only a decoder hint; EXIF orientation is still applied below.
+            source.draft("RGB", JPEG_DRAFT_SIZE)
         icc_profile = source.info.get("icc_profile")
 
+        orientation = 1
         exif_bytes: bytes | None = None
         try:
             exif_data = source.getexif()
+            orientation = exif_data.get(274, 1)
             if exif_data:
-                exif_data[274] = 1  # Orientation: normalized after exif_transpose
+                exif_data[274] = 1  # Orientation: normalized by the transpose below
                 exif_bytes = exif_data.tobytes()
         except Exception:
             exif_bytes = source.info.get("exif")
 
-        image = ImageOps.exif_transpose(source)
+        # Same mapping as ImageOps.exif_transpose, reusing the EXIF parsed above.
+        transpose_method = _EXIF_TRANSPOSE.get(orientation)
+        image = source.transpose(transpose_method) if transpose_method is not None else source.copy()
         image.load()
 
+    return _flatten_to_rgb(image), icc_profile, exif_bytes
+
+
+def _flatten_to_rgb(image: Image.Image) -> Image.Image:
     if image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info):
         rgba_image = image.convert("RGBA")
-        white_bg = Image.new("RGBA", rgba_image.size, (255, 255, 255, 255))
-        image = Image.alpha_composite(white_bg, rgba_image).convert("RGB")
-    else:
-        image = image.convert("RGB")
-
-    return image, icc_profile, exif_bytes
+        if rgba_image.getextrema()[3] == (255, 255):
+            return rgba_image.convert("RGB")
+        white_bg = Image.new("RGB", rgba_image.size, (255, 255, 255))
+        white_bg.paste(rgba_image, mask=rgba_image.getchannel("A"))
+        return white_bg
+    if image.mode == "RGB":
+        return image
+    return image.convert("RGB")
 
 
 def _compute_energy_map(image: Image.Image) -> np.ndarray:
-    gray = np.asarray(image.convert("L"), dtype=np.float32) / 255.0
+    gray_image = image.convert("L")
+    gray = np.asarray(gray_image, dtype=np.float32) * (1.0 / 255.0)
 
-    gx = np.zeros_like(gray)
+    # Gradient magnitude accumulated in place: one buffer, no per-step temporaries.
+    energy = np.zeros_like(gray)
+    np.subtract(gray[:, 2:], gray[:, :-2], out=energy[:, 1:-1])
+    np.abs(energy[:, 1:-1], out=energy[:, 1:-1])
     gy = np.zeros_like(gray)
-    gx[:, 1:-1] = np.abs(gray[:, 2:] - gray[:, :-2])
-    gy[1:-1, :] = np.abs(gray[2:, :] - gray[:-2, :])
-    gradient = gx + gy
+    np.subtract(gray[2:, :], gray[:-2, :], out=gy[1:-1, :])
+    np.abs(gy[1:-1, :], out=gy[1:-1, :])
+    energy += gy
+    energy *= 0.75
 
     blurred = np.asarray(
-        image.convert("L").filter(ImageFilter.GaussianBlur(radius=2.0)),
+        gray_image.filter(ImageFilter.GaussianBlur(radius=2.0)),
         dtype=np.float32,
-    ) / 255.0
-    contrast = np.abs(gray - blurred)
+    ) * (1.0 / 255.0)
+    # Reuse the blurred buffer for the local contrast term.
+    np.subtract(gray, blurred, out=blurred)
+    np.abs(blurred, out=blurred)
+    blurred *= 0.25
+    energy += blurred
 
-    energy = (gradient * 0.75) + (contrast * 0.25)
     energy -= float(energy.min())
     peak = float(energy.max())
     if peak > 1e-8:
-        energy /= peak
+        np.divide(energy, peak, out=energy)
     return energy
 
 
 def _compute_salient_bbox(energy: np.ndarray) -> tuple[int, int, int, int] | None:
-    percentile = 88.0
-    threshold = float(np.percentile(energy, percentile))
+    # The energy map is normalized to [0, 1], so a fixed 256-bin histogram gives
+    # the top-12% threshold in one O(n) pass instead of a full percentile partition.
+    top_fraction = 0.12
+    bins = 256
+    hist, _ = np.histogram(energy, bins=bins, range=(0.0, 1.0))
+    from_top = np.cumsum(hist[::-1])
+    bin_index = bins - 1 - int(np.searchsorted(from_top, energy.size * top_fraction))
+    threshold = max(0, bin_index) / bins
     mask = energy >= threshold
 
     if int(mask.sum()) < max(16, int(energy.size * 0.002)):
         return None
 
-    ys, xs = np.nonzero(mask)
-    x0, x1 = int(xs.min()), int(xs.max() + 1)
-    y0, y1 = int(ys.min()), int(ys.max() + 1)
+    cols = mask.any(axis=0)
+    rows = mask.any(axis=1)
+    x0, x1 = int(cols.argmax()), int(cols.size - cols[::-1].argmax())
+    y0, y1 = int(rows.argmax()), int(rows.size - rows[::-1].argmax())
 
     pad_x = max(2, int((x1 - x0) * 0.08))
     pad_y = max(2, int((y1 - y0) * 0.08))
@@ -142,6 +220,13 @@ def _intersection_ratio(
     return inter_area / bbox_area
 
 
+# (energy, overlap, focus, center) weights, keyed by safe_mode.
+_SCORE_WEIGHTS: dict[bool, tuple[float, float, float, float]] = {
+    False: (0.75, 0.40, 0.40, 0.15),
+    True: (0.55, 0.55, 0.45, 0.35),
+}
+
+
 def _score_candidate(
     *,
     x: int,
@@ -164,27 +249,75 @@ def _score_candidate(
 
     focus_dx = (crop_cx - focus_center[0]) / max(1.0, width)
     focus_dy = (crop_cy - focus_center[1]) / max(1.0, height)
-    focus_dist = float(np.hypot(focus_dx, focus_dy))
+    focus_dist = math.hypot(focus_dx, focus_dy)
     focus_score = 1.0 - min(1.0, focus_dist * 2.0)
 
     center_dx = (crop_cx - image_cx) / max(1.0, width)
     center_dy = (crop_cy - image_cy) / max(1.0, height)
-    center_dist = float(np.hypot(center_dx, center_dy))
+    center_dist = math.hypot(center_dx, center_dy)
     center_score = 1.0 - min(1.0, center_dist * 2.0)
 
-    if safe_mode:
-        return (
-            (energy_score * 0.55)
-            + (overlap_score * 0.55)
-            + (focus_score * 0.45)
-            + (center_score * 0.35)
-        )
+    w_energy, w_overlap, w_focus, w_center = _SCORE_WEIGHTS[safe_mode]
+    return (
+        (energy_score * w_energy)
+        + (overlap_score * w_overlap)
+        + (focus_score * w_focus)
+        + (center_score * w_center)
+    )
+
+
+def _score_candidates(
+    *,
+    xs: np.ndarray | int,
+    ys: np.ndarray | int,
+    side: int,
+    width: int,
+    height: int,
+    energy_integral: np.ndarray,
+    salient_bbox: tuple[int, int, int, int] | None,
+    focus_center: tuple[float, float],
+    safe_mode: bool,
+) -> np.ndarray:
+    """Vectorized `_score_candidate` over every offset in `xs`/`ys` at once."""
+    x2 = xs + side
+    y2 = ys + side
+    region_sums = (
+        energy_integral[y2, x2]
+        - energy_integral[ys, x2]
+        - energy_integral[y2, xs]
+        + energy_integral[ys, xs]
+    ).astype(np.float64)
+    energy_score = region_sums / max(1.0, float(side * side))
+
+    if salient_bbox is None:
+        overlap_score = np.zeros_like(energy_score)
+    else:
+        inter_w = np.clip(np.minimum(x2, salient_bbox[2]) - np.maximum(xs, salient_bbox[0]), 0, None)
+        inter_h = np.clip(np.minimum(y2, salient_bbox[3]) - np.maximum(ys, salient_bbox[1]), 0, None)
+        bbox_area = max(1, (salient_bbox[2] - salient_bbox[0]) * (salient_bbox[3] - salient_bbox[1]))
+        overlap_score = (inter_w * inter_h) / bbox_area
+
+    crop_cx = xs + (side / 2.0)
+    crop_cy = ys + (side / 2.0)
+
+    focus_dist = np.hypot(
+        (crop_cx - focus_center[0]) / max(1.0, width),
+        (crop_cy - focus_center[1]) / max(1.0, height),
+    )
+    focus_score = 1.0 - np.minimum(1.0, focus_dist * 2.0)
+
+    center_dist = np.hypot(
+        (crop_cx - (width / 2.0)) / max(1.0, width),
+        (crop_cy - (height / 2.0)) / max(1.0, height),
+    )
+    center_score = 1.0 - np.minimum(1.0, center_dist * 2.0)
 
+    w_energy, w_overlap, w_focus, w_center = _SCORE_WEIGHTS[safe_mode]
     return (
-        (energy_score * 0.75)
-        + (overlap_score * 0.40)
-        + (focus_score * 0.40)
-        + (center_score * 0.15)
+        (energy_score * w_energy)
+        + (overlap_score * w_overlap)
+        + (focus_score * w_focus)
+        + (center_score * w_center)
     )
 
 
@@ -193,11 +326,22 @@ def _smart_crop_box(image: Image.Image, safe_mode: bool) -> tuple[tuple[int, int
     if width == height:
         return (0, 0, width, height), "already_square"
 
+    # Nearly square exports leave only a sliver to move the crop over; every
+    # candidate scores alike, so skip the saliency pipeline entirely.
+    short_side, long_side = (width, height) if width <= height else (height, width)
+    if short_side / long_side > 0.97:
+        return _center_crop_box(width, height), "near_square_center"
+
     max_side = max(width, height)
     if max_side > 512:
         scale = 512 / max_side
         scaled_size = (max(64, int(round(width * scale))), max(64, int(round(height * scale))))
-        scaled = image.resize(scaled_size, Image.Resampling.BILINEAR)
+        # Cheap integer box reduction first, so the bilinear pass only touches a
+        # small image instead of every source pixel.
+        reduce_factor = max_side // 512
+        scaled = image.reduce(reduce_factor) if reduce_factor > 1 else image
+        if scaled.size != scaled_size:
+            scaled = scaled.resize(scaled_size, Image.Resampling.BILINEAR)
     else:
         scaled = image
 
@@ -230,50 +374,19 @@ def _smart_crop_box(image: Image.Image, safe_mode: bool) -> tuple[tuple[int, int
     if side <= 0:
         return _center_crop_box(width, height), "fallback_center"
 
-    energy_integral = np.pad(energy, ((1, 0), (1, 0)), mode="constant", constant_values=0.0)
-    energy_integral = energy_integral.cumsum(axis=0).cumsum(axis=1)
+    energy_integral = np.zeros((sh + 1, sw + 1), dtype=np.float32)
+    energy_integral[1:, 1:] = energy
+    np.cumsum(energy_integral, axis=0, out=energy_integral)
+    np.cumsum(energy_integral, axis=1, out=energy_integral)
 
+    # Every offset along the free axis is scored in one vectorized pass; the
+    # focus-aligned offset is always within [0, movable] so it is covered too.
     if sw > sh:
         movable = sw - side
-        offsets = list(range(0, movable + 1))
-        target_offset = int(round(focus_center[0] - (side / 2.0)))
-        if target_offset not in offsets:
-            offsets.append(max(0, min(movable, target_offset)))
-        best_score = float("-inf")
-        best_offset = movable // 2
-        for x in offsets:
-            score = _score_candidate(
-                x=x,
-                y=0,
-                side=side,
-                width=sw,
-                height=sh,
-                energy_integral=energy_integral,
-                salient_bbox=salient_bbox,
-                focus_center=focus_center,
-                safe_mode=safe_mode,
-            )
-            if score > best_score:
-                best_score = score
-                best_offset = x
-
-        side_original = height
-        left = int(round(best_offset * (width / max(1, sw))))
-        left = max(0, min(left, width - side_original))
-        return (left, 0, left + side_original, side_original), "smart_saliency"
-
-    movable = sh - side
-    offsets = list(range(0, movable + 1))
-    target_offset = int(round(focus_center[1] - (side / 2.0)))
-    if target_offset not in offsets:
-        offsets.append(max(0, min(movable, target_offset)))
-
-    best_score = float("-inf")
-    best_offset = movable // 2
-    for y in offsets:
-        score = _score_candidate(
-            x=0,
-            y=y,
+        xs = np.arange(movable + 1)
+        scores = _score_candidates(
+            xs=xs,
+            ys=0,
             side=side,
             width=sw,
             height=sh,
@@ -282,9 +395,27 @@ def _smart_crop_box(image: Image.Image, safe_mode: bool) -> tuple[tuple[int, int
             focus_center=focus_center,
             safe_mode=safe_mode,
         )
-        if score > best_score:
-            best_score = score
-            best_offset = y
+        best_offset = int(xs[int(scores.argmax())])
+
+        side_original = height
+        left = int(round(best_offset * (width / max(1, sw))))
+        left = max(0, min(left, width - side_original))
+        return (left, 0, left + side_original, side_original), "smart_saliency"
+
+    movable = sh - side
+    ys = np.arange(movable + 1)
+    scores = _score_candidates(
+        xs=0,
+        ys=ys,
+        side=side,
+        width=sw,
+        height=sh,
+        energy_integral=energy_integral,
+        salient_bbox=salient_bbox,
+        focus_center=focus_center,
+        safe_mode=safe_mode,
+    )
+    best_offset = int(ys[int(scores.argmax())])
 
     side_original = width
     top = int(round(best_offset * (height / max(1, sh))))
@@ -292,6 +423,21 @@ def _smart_crop_box(image: Image.Image, safe_mode: bool) -> tuple[tuple[int, int
     return (0, top, side_original, top + side_original), "smart_saliency"
 
 
+def process_image(image: Image.Image, *, safe_mode: bool = False) -> tuple[Image.Image, str]:
+    """Crop and resize an in-memory image to TARGET_SIZE; returns it with the crop method."""
+    image = _flatten_to_rgb(image)
+
+    crop_method = "fallback_center"
+    try:
+        crop_box, crop_method = _smart_crop_box(image, safe_mode=safe_mode)
+    except Exception:
+        crop_box = _center_crop_box(*image.size)
+        crop_method = "fallback_center"
+
+    cropped = image.crop(crop_box)
+    return cropped.resize(TARGET_SIZE, Image.Resampling.LANCZOS), crop_method
+
+
 def process_image_file(
     input_path: Path | str,
     output_dir: Path | str,
@@ -315,15 +461,7 @@ def process_image_file(
     except Exception as exc:
         return ProcessResult(src_path, dst_path, "error", f"No se pudo abrir: {exc}")
 
-    crop_method = "fallback_center"
-    try:
-        crop_box, crop_method = _smart_crop_box(image, safe_mode=safe_mode)
-    except Exception:
-        crop_box = _center_crop_box(*image.size)
-        crop_method = "fallback_center"
-
-    cropped = image.crop(crop_box)
-    resized = cropped.resize(TARGET_SIZE, Image.Resampling.LANCZOS)
+    resized, crop_method = process_image(image, safe_mode=safe_mode)
 
     save_kwargs: dict[str, object] = {
         "format": "JPEG",
@@ -338,7 +476,11 @@ def process_image_file(
         save_kwargs["exif"] = exif_bytes
 
     try:
-        resized.save(dst_path, **save_kwargs)
+        # Encode in memory and hand the file a single write instead of many small
+        # chunks; a failed encode also never leaves a partial file behind.
+        buffer = BytesIO()
+        resized.save(buffer, **save_kwargs)
+        dst_path.write_bytes(buffer.getbuffer())
     except Exception as exc:
         return ProcessResult(src_path, dst_path, "error", f"No se pudo guardar: {exc}", crop_method)
 
@@ -358,11 +500,11 @@ def process_batch(
     if not paths:
         return []
 
-    index_by_path = {path: index for index, path in enumerate(paths)}
-    results: list[ProcessResult] = []
     total = len(paths)
+    results: list[ProcessResult | None] = [None] * total
 
-    with ThreadPoolExecutor(max_workers=max(1, min(workers, 8))) as pool:
+    # Separate processes so the NumPy/scoring parts of each job don't contend for the GIL.
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, 8))) as pool:
         future_map = {
             pool.submit(
                 process_image_file,
@@ -370,25 +512,26 @@ def process_batch(
                 output_dir,
                 overwrite=overwrite,
                 safe_mode=safe_mode,
-            ): path
-            for path in paths
+            ): index
+            for index, path in enumerate(paths)
         }
 
         done = 0
         for future in as_completed(future_map):
-            src_path = future_map[future]
+            index = future_map[future]
             try:
                 result = future.result()
             except Exception as exc:
                 result = ProcessResult(
-                    input_path=src_path,
-                    output_path=build_output_path(src_path, Path(output_dir)),
+                    input_path=paths[index],
+                    output_path=build_output_path(paths[index], Path(output_dir)),
                     status="error",
                     message=f"Error inesperado: {exc}",
                 )
             done += 1
-            results.append(result)
+            results[index] = result
             if progress_callback:
                 progress_callback(done, total, result)
 
-    return sorted(results, key=lambda item: index_by_path.get(item.input_path, 0))
+    # Every slot is filled once all futures have completed, in input order.
+    return cast("list[ProcessResult]", results)
@@ -1,15 +1,84 @@
 from __future__ import annotations
 
+import hashlib
+import os
 from pathlib import Path
+from queue import SimpleQueue
 
-from PySide6.QtCore import QObject, QRunnable, Signal
+from PySide6.QtCore import QObject, QRunnable, Qt, Signal
+from PySide6.QtGui import QImage
 
 from .processor import ProcessResult, process_image_file
 
 
-class WorkerSignals(QObject):
-    started = Signal(int)
-    finished = Signal(int, object)
+class ThumbnailSignals(QObject):
+    ready = Signal(object, QImage)
+
+
+def load_thumbnail(path: Path, cache_dir: Path | None, size: int = 56) -> QImage | None:
+    cache_path: Path | None = None
+    if cache_dir is not None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        key = hashlib.blake2b(
+            f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+        cache_path = cache_dir / f"{key}.png"
+        if cache_path.exists():
+            cached = QImage(str(cache_path))
+            if not cached.isNull():
+                try:
+                    os.utime(cache_path)  # Mark as recently used for prune_thumbnail_cache.
+                except OSError:
+                    pass
+                return cached
+
+    image = QImage(str(path))
+    if image.isNull():
+        return None
+    thumb = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if cache_path is not None:
+        thumb.save(str(cache_path), "PNG")
+    return thumb
+
+
+def prune_thumbnail_cache(cache_dir: Path, max_entries: int = 2000) -> None:
+    """Delete the least recently used cached thumbnails beyond `max_entries`."""
+    try:
+        with os.scandir(cache_dir) as scan:
+            entries = [
+                (entry.stat().st_mtime, entry.path)
+                for entry in scan
+                if entry.name.endswith(".png") and entry.is_file()
+            ]
+    except OSError:
+        return
+    if len(entries) <= max_entries:
+        return
+
+    entries.sort()
+    for _, stale_path in entries[:-max_entries]:
+        try:
+            os.remove(stale_path)
+        except OSError:
+            continue
+
+
+class ThumbnailWorker(QRunnable):
+    def __init__(self, path: Path, cache_dir: Path | None, signals: ThumbnailSignals) -> None:
+        super().__init__()
+        self.path = path
+        self.cache_dir = cache_dir
+        self.signals = signals
+
+    def run(self) -> None:
+        # QImage is safe off the GUI thread; the window turns it into a QIcon on receipt.
+        thumb = load_thumbnail(self.path, self.cache_dir)
+        if thumb is not None:
+            self.signals.ready.emit(self.path, thumb)
 
 
 class ImageWorker(QRunnable):
@@ -21,6 +90,7 @@ class ImageWorker(QRunnable):
         *,
         overwrite: bool,
         safe_mode: bool,
+        result_queue: SimpleQueue[tuple[int, ProcessResult | None]],
     ) -> None:
         super().__init__()
         self.row = row
@@ -28,10 +98,12 @@ class ImageWorker(QRunnable):
         self.output_dir = output_dir
         self.overwrite = overwrite
         self.safe_mode = safe_mode
-        self.signals = WorkerSignals()
+        self.result_queue = result_queue
 
     def run(self) -> None:
-        self.signals.started.emit(self.row)
+        # Progress goes through a queue the GUI drains in batches instead of one
+        # cross-thread signal per event; `None` marks the job as started.
+        self.result_queue.put((self.row, None))
         try:
             result = process_image_file(
                 self.input_path,
@@ -46,4 +118,4 @@ class ImageWorker(QRunnable):
                 status="error",
                 message=f"Error inesperado en worker: {exc}",
             )
-        self.signals.finished.emit(self.row, result)
+        self.result_queue.put((self.row, result))
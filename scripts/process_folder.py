@@ -1,3 +1,4 @@
+from multiprocessing import freeze_support
 from pathlib import Path
 import sys
 
@@ -9,4 +10,5 @@ from mockup_manager.cli import main
 
 
 if __name__ == "__main__":
+    freeze_support()
     raise SystemExit(main())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import PIL
+import pytest
+from PIL import Image, features
+
+
+def pytest_report_header(config) -> str:
+    # Pillow-SIMD releases carry a ".postN" suffix on the upstream version.
+    simd = " (SIMD)" if ".post" in PIL.__version__ else ""
+    jpeg = "libjpeg-turbo" if features.check("libjpeg_turbo") else "libjpeg"
+    return f"Pillow {PIL.__version__}{simd}, {jpeg} {features.version('jpg')}"
+
+
+def _blank_canvas(size: tuple[int, int]) -> np.ndarray:
+    w, h = size
+    return np.full((h, w, 3), 255, dtype=np.uint8)
+
+
+def _save_fixture(path: Path, pixels: np.ndarray) -> Path:
+    image = Image.fromarray(pixels)
+    # Fixtures are decoded right away, so skip codec work on write where possible.
+    if path.suffix == ".tif":
+        image.save(path, format="TIFF", compression="raw")
+    else:
+        image.save(path, format="JPEG", quality=85, optimize=False, progressive=False, subsampling=2)
+    return path
+
+
+@pytest.fixture(scope="session")
+def fixtures_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("fixtures")
+
+
+@pytest.fixture(scope="session")
+def horizontal_tif(fixtures_dir: Path) -> Path:
+    pixels = _blank_canvas((1600, 900))
+    pixels[225:675, 640:960] = (20, 170, 20)  # middle 20% of the width, 50% of the height
+    return _save_fixture(fixtures_dir / "horizontal.tif", pixels)
+
+
+@pytest.fixture(scope="session")
+def vertical_tif(fixtures_dir: Path) -> Path:
+    pixels = _blank_canvas((900, 1600))
+    pixels[640:960, 225:675] = (180, 30, 30)  # middle 50% of the width, 20% of the height
+    return _save_fixture(fixtures_dir / "vertical.tif", pixels)
+
+
+@pytest.fixture(scope="session")
+def centered_jpg(fixtures_dir: Path) -> Path:
+    pixels = _blank_canvas((1200, 1200))
+    ys, xs = np.ogrid[:1200, :1200]
+    pixels[(xs - 600) ** 2 + (ys - 600) ** 2 <= 240**2] = (30, 80, 190)  # disc, radius 20% of side
+    return _save_fixture(fixtures_dir / "centered.jpg", pixels)
+
+
+@pytest.fixture(scope="session")
+def near_square_tif(fixtures_dir: Path) -> Path:
+    pixels = _blank_canvas((1000, 980))
+    pixels[:, :100] = (20, 20, 20)  # left 10% of the width
+    return _save_fixture(fixtures_dir / "near_square.tif", pixels)
@@ -1,73 +1,170 @@
 from __future__ import annotations
 
+import shutil
 from pathlib import Path
 
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image
 
-from mockup_manager.processor import process_image_file
+from mockup_manager.processor import (
+    _flatten_to_rgb,
+    _prepare_image,
+    _score_candidate,
+    _score_candidates,
+    collect_images_from_directory,
+    process_image,
+    process_image_file,
+)
 
 
-def _create_image(path: Path, size: tuple[int, int], draw_subject) -> None:
-    image = Image.new("RGB", size, "white")
-    draw = ImageDraw.Draw(image)
-    draw_subject(draw, size)
-    image.save(path)
+def test_horizontal_image_outputs_exact_800(tmp_path: Path, horizontal_tif: Path) -> None:
+    input_path = tmp_path / "horizontal.tif"
+    output_dir = tmp_path
 
-
-def test_horizontal_image_outputs_exact_800(tmp_path: Path) -> None:
-    input_path = tmp_path / "horizontal.png"
-    output_dir = tmp_path / "out"
-    output_dir.mkdir()
-
-    def draw_subject(draw: ImageDraw.ImageDraw, size: tuple[int, int]) -> None:
-        w, h = size
-        draw.rectangle((w * 0.4, h * 0.25, w * 0.6, h * 0.75), fill=(20, 170, 20))
-
-    _create_image(input_path, (1600, 900), draw_subject)
+    shutil.copyfile(horizontal_tif, input_path)
     result = process_image_file(input_path, output_dir, overwrite=True, safe_mode=False)
 
     assert result.status == "ok"
     with Image.open(result.output_path) as out:
         assert out.size == (800, 800)
-        center = out.getpixel((400, 400))
+        out.load()
+        pixels = np.asarray(out)
+    center = pixels[400, 400]
     assert center[1] > 120
 
 
-def test_vertical_image_outputs_exact_800(tmp_path: Path) -> None:
-    input_path = tmp_path / "vertical.png"
-    output_dir = tmp_path / "out"
-    output_dir.mkdir()
-
-    def draw_subject(draw: ImageDraw.ImageDraw, size: tuple[int, int]) -> None:
-        w, h = size
-        draw.rectangle((w * 0.25, h * 0.4, w * 0.75, h * 0.6), fill=(180, 30, 30))
+def test_vertical_image_outputs_exact_800(tmp_path: Path, vertical_tif: Path) -> None:
+    input_path = tmp_path / "vertical.tif"
+    output_dir = tmp_path
 
-    _create_image(input_path, (900, 1600), draw_subject)
+    shutil.copyfile(vertical_tif, input_path)
     result = process_image_file(input_path, output_dir, overwrite=True, safe_mode=False)
 
     assert result.status == "ok"
     with Image.open(result.output_path) as out:
         assert out.size == (800, 800)
-        center = out.getpixel((400, 400))
+        out.load()
+        pixels = np.asarray(out)
+    center = pixels[400, 400]
     assert center[0] > 120
 
 
-def test_centered_subject_kept_centered(tmp_path: Path) -> None:
+def test_centered_subject_kept_centered(tmp_path: Path, centered_jpg: Path) -> None:
     input_path = tmp_path / "centered.jpg"
-    output_dir = tmp_path / "out"
-    output_dir.mkdir()
+    output_dir = tmp_path
 
-    def draw_subject(draw: ImageDraw.ImageDraw, size: tuple[int, int]) -> None:
-        w, h = size
-        radius = min(w, h) * 0.2
-        cx, cy = w * 0.5, h * 0.5
-        draw.ellipse((cx - radius, cy - radius, cx + radius, cy + radius), fill=(30, 80, 190))
-
-    _create_image(input_path, (1200, 1200), draw_subject)
+    shutil.copyfile(centered_jpg, input_path)
     result = process_image_file(input_path, output_dir, overwrite=True, safe_mode=True)
 
     assert result.status == "ok"
     with Image.open(result.output_path) as out:
         assert out.size == (800, 800)
-        center = out.getpixel((400, 400))
+        out.load()
+        pixels = np.asarray(out)
+    center = pixels[400, 400]
     assert center[2] > 120
+
+
+def test_process_image_flattens_transparency_in_memory() -> None:
+    image = Image.new("RGBA", (1200, 700), (0, 0, 0, 0))
+
+    result, crop_method = process_image(image)
+
+    assert result.mode == "RGB"
+    assert result.size == (800, 800)
+    assert crop_method == "fallback_center"
+    assert tuple(np.asarray(result)[400, 400]) == (255, 255, 255)
+
+
+def test_flatten_blends_partial_alpha_onto_white() -> None:
+    image = Image.new("RGBA", (4, 4), (200, 0, 0, 128))
+
+    flattened = _flatten_to_rgb(image)
+
+    assert flattened.mode == "RGB"
+    red, green, blue = (int(value) for value in np.asarray(flattened)[0, 0])
+    assert abs(red - 227) <= 1
+    assert abs(green - 127) <= 1
+    assert abs(blue - 127) <= 1
+
+
+def test_flatten_opaque_rgba_keeps_colors() -> None:
+    image = Image.new("RGBA", (4, 4), (10, 20, 30, 255))
+
+    flattened = _flatten_to_rgb(image)
+
+    assert flattened.mode == "RGB"
+    assert tuple(np.asarray(flattened)[0, 0]) == (10, 20, 30)
+
+
+def test_flatten_matches_alpha_composite_on_white() -> None:
+    rng = np.random.default_rng(1)
+    image = Image.fromarray(rng.integers(0, 256, (50, 60, 4), dtype=np.uint8))
+    white = Image.new("RGBA", image.size, (255, 255, 255, 255))
+    expected = Image.alpha_composite(white, image).convert("RGB")
+
+    flattened = _flatten_to_rgb(image)
+
+    assert np.array_equal(np.asarray(flattened), np.asarray(expected))
+
+
+def test_exif_orientation_is_applied(tmp_path: Path) -> None:
+    input_path = tmp_path / "rotated.jpg"
+    exif = Image.Exif()
+    exif[274] = 6
+    Image.new("RGB", (300, 200), (255, 255, 255)).save(input_path, exif=exif.tobytes())
+
+    image, _, exif_bytes = _prepare_image(input_path)
+
+    assert image.size == (200, 300)
+    assert exif_bytes is not None
+    restored = Image.Exif()
+    restored.load(exif_bytes)
+    assert restored[274] == 1
+
+
+def test_near_square_image_uses_center_crop(tmp_path: Path, near_square_tif: Path) -> None:
+    input_path = tmp_path / "near_square.tif"
+    output_dir = tmp_path
+
+    shutil.copyfile(near_square_tif, input_path)
+    result = process_image_file(input_path, output_dir, overwrite=True, safe_mode=False)
+
+    assert result.status == "ok"
+    assert result.crop_method == "near_square_center"
+
+
+def test_vectorized_scores_match_scalar_scorer() -> None:
+    rng = np.random.default_rng(7)
+    energy = rng.random((60, 100), dtype=np.float32)
+    integral = np.pad(energy, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    kwargs = {
+        "side": 60,
+        "width": 100,
+        "height": 60,
+        "energy_integral": integral,
+        "salient_bbox": (30, 10, 70, 50),
+        "focus_center": (45.0, 30.0),
+    }
+
+    for safe_mode in (False, True):
+        xs = np.arange(41)
+        scores = _score_candidates(xs=xs, ys=0, safe_mode=safe_mode, **kwargs)
+        expected = [_score_candidate(x=int(x), y=0, safe_mode=safe_mode, **kwargs) for x in xs]
+        assert np.allclose(scores, expected)
+
+
+def test_collect_images_filters_and_recurses(tmp_path: Path) -> None:
+    nested = tmp_path / "nested" / "deep"
+    nested.mkdir(parents=True)
+    (tmp_path / "folder.jpg").mkdir()
+    for name in ("a.PNG", "notes.txt", "png", "nested/b.jpg", "nested/deep/c.tiff"):
+        (tmp_path / name).touch()
+
+    assert collect_images_from_directory(tmp_path) == [
+        tmp_path / "a.PNG",
+        tmp_path / "nested" / "b.jpg",
+        tmp_path / "nested" / "deep" / "c.tiff",
+    ]
+    assert collect_images_from_directory(tmp_path, recursive=False) == [tmp_path / "a.PNG"]
+    assert collect_images_from_directory(tmp_path / "missing") == []